@@ -1,12 +1,18 @@
+import io
+import sys
+from pathlib import Path
+
 import numpy as np
-import pandas as pd
 import streamlit as st
 import matplotlib.pyplot as plt
 
-from scipy.interpolate import PchipInterpolator
-from scipy.optimize import brentq
+from matplotlib.collections import PolyCollection
 from matplotlib.patches import Patch
 
+# Make the repo-level `phantoms` package importable under `streamlit run`
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from phantoms import core  # noqa: E402
+
 
 # -----------------------------
 # Page config
@@ -19,7 +25,7 @@ st.caption("Enter a target Young’s modulus (kPa). If multiple Ecoflex series o
 # -----------------------------
 # Data (UPDATED with EF50_25T + EF30_25T)
 # -----------------------------
-PHANTOMS = [
+PHANTOMS = (
     ("EF50_0T",    "EF50", 0.0,   152.70070288580004),
     ("EF50_12_5T", "EF50", 12.5,  111.09930866645567),
     ("EF50_25T",   "EF50", 25.0,   89.49278526799354),
@@ -37,67 +43,106 @@ PHANTOMS = [
     ("EF10_75T",   "EF10", 75.0,    8.814412371336129),
     ("EF10_87_5T", "EF10", 87.5,    7.915154597748689),
     ("EF10_100T",  "EF10", 100.0,   5.422521729130547),
-]
+)
+
+# Gap-policy boundary levels (kPa), ascending
+GAP_LEVELS_KPA = np.array(sorted([
+    # 111.09930866645567,  # EF50_12_5T
+    # 97.25997744487732,   # EF30_0T
+    65.68354113025582,   # EF30_12_5T
+    54.20947752233499    # EF10_0T
+]))
 
 
 # -----------------------------
 # Build per-family interpolators
+# (cached: Streamlit reruns the whole script on every widget interaction)
 # -----------------------------
+@st.cache_resource(show_spinner=False)
 def build_families(phantoms):
-    families = {}
-    for label, fam, t, E in phantoms:
-        families.setdefault(fam, {"t": [], "E": [], "labels": []})
-        families[fam]["t"].append(float(t))
-        families[fam]["E"].append(float(E))
-        families[fam]["labels"].append(label)
-
-    for fam, d in families.items():
-        order = np.argsort(d["t"])
-        d["t"] = np.array(d["t"], dtype=float)[order]
-        d["E"] = np.array(d["E"], dtype=float)[order]
-        d["labels"] = list(np.array(d["labels"], dtype=object)[order])
-
-        if len(d["t"]) >= 2:
-            d["interp"] = PchipInterpolator(d["t"], d["E"], extrapolate=False)
-            d["tmin"], d["tmax"] = float(d["t"].min()), float(d["t"].max())
-            d["Emin"], d["Emax"] = float(d["E"].min()), float(d["E"].max())
-    return families
-
-
-families = build_families(PHANTOMS)
-
-ALL_MEASURED = sorted(
-    [(float(E), fam, float(t), label) for (label, fam, t, E) in PHANTOMS],
-    key=lambda x: x[0]
-)
+    return core.build_families(phantoms)
+
+
+@st.cache_data(show_spinner=False)
+def sort_measured(phantoms):
+    return core.sort_measured(phantoms)
 
 
-def invert_family(fam_name, E_target):
-    d = families[fam_name]
-    f = d["interp"]
+families, _, _ = build_families(PHANTOMS)
+
+ALL_MEASURED = sort_measured(PHANTOMS)
+
+
+# -----------------------------
+# Plot (rendered once to PNG: the figure only depends on the measured data)
+# -----------------------------
+def make_plot(phantoms):
+    fig, ax = plt.subplots(figsize=(7.5, 5.2))
+
+    families, t_meas, E_meas = build_families(phantoms)
+
+    # measured points
+    ax.plot(t_meas, E_meas, "o", label="Measured (phantoms)", zorder=3)
+
+    # ---- GAP SHADING (updated + correct) ----
+    # Make sure shading spans the visible plot region:
+    ymin = float(np.min(E_meas))
+    ymax = float(np.max(E_meas))
+    pad = 0.05 * (ymax - ymin)
+    ymin_plot = ymin - pad
+    ymax_plot = ymax + pad
+    ax.set_ylim(ymin_plot, ymax_plot)
 
-    def g(t):
-        return float(f(t) - E_target)
+    # Shade the *gaps* (inverse of validated bands)
+    # Bands: [ymin, L1], [L1, L2], [L2, L3], [L3, L4], [L4, ymax]
+    # We shade i%2==1 to highlight the "gap" bands (as per your earlier request).
+    bounds = np.empty(len(GAP_LEVELS_KPA) + 2)
+    bounds[0], bounds[1:-1], bounds[-1] = ymin_plot, GAP_LEVELS_KPA, ymax_plot
+    # All gap bands as one collection (x in axes coords, y in data, like axhspan)
+    verts = [[(0, lo), (1, lo), (1, hi), (0, hi)] for lo, hi in zip(bounds[1::2], bounds[2::2])]
+    ax.add_collection(
+        PolyCollection(verts, transform=ax.get_yaxis_transform(), alpha=0.10, linewidth=0, zorder=0),
+        autolim=False,
+    )
 
-    t_star = float(brentq(g, d["tmin"], d["tmax"]))
-    E_pred = float(f(t_star))
+    # Dotted reference lines at the four boundaries
+    for y in GAP_LEVELS_KPA:
+        ax.axhline(y=y, linestyle=":", linewidth=1.2, alpha=0.8, zorder=1)
 
-    j = int(np.argmin(np.abs(d["E"] - E_target)))
-    nearest_label = d["labels"][j]
-    nearest_E = float(d["E"][j])
+    # interpolated curves
+    for fam in sorted(families.keys()):
+        d = families[fam]
+        if "interp" not in d:
+            continue
+        ax.plot(d["t_fine"], d["E_fine"], label=f"{fam} interpolation", zorder=2)
 
-    return t_star, E_pred, nearest_label, nearest_E
+    # show target
+    # ax.axhline(E_target, linestyle="--", linewidth=1.2, zorder=2)
+    
 
+    ax.set_xlabel("Thinner concentration (%)")
+    ax.set_ylabel("Elastic modulus (kPa)")
+    ax.grid(True, alpha=0.3)
 
-def nearest_bounds(E_target):
-    lower = None
-    upper = None
-    for E, fam, t, label in ALL_MEASURED:
-        if E <= E_target:
-            lower = (E, fam, t, label)
-        if E >= E_target and upper is None:
-            upper = (E, fam, t, label)
-    return lower, upper
+    # Add a legend item for shaded gaps (without changing your existing legend too much)
+    gap_patch = Patch(alpha=0.10, label="Non-validated gaps")
+    handles, labels_ = ax.get_legend_handles_labels()
+    handles.append(gap_patch)
+    labels_.append("Non-validated gaps")
+    ax.legend(handles, labels_, loc="best")
+
+    fig.tight_layout()
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def plot_png(phantoms):
+    fig = make_plot(phantoms)
+    buf = io.BytesIO()
+    # same settings st.pyplot uses
+    fig.savefig(buf, format="png", dpi=200, bbox_inches="tight")
+    plt.close(fig)
+    return buf.getvalue()
 
 
 # -----------------------------
@@ -115,11 +160,15 @@ with left:
         step=1.0
     )
 
-    feasible = [
-        fam for fam, d in families.items()
-        if ("interp" in d) and (d["Emin"] <= E_target <= d["Emax"])
-    ]
-    feasible = sorted(feasible)
+    feasible, non_invertible = core.covering_families(families, E_target)
+
+    # Covered by measurements, but the curve cannot be inverted: say so rather
+    # than reporting the target as a gap
+    for fam in non_invertible:
+        st.warning(
+            f"{fam} covers this modulus, but its measured modulus is not strictly "
+            "monotone in thinner, so it cannot be inverted."
+        )
 
     chosen_fam = None
 
@@ -136,7 +185,7 @@ with left:
             chosen_fam = feasible[0]
             st.write(f"Family: **{chosen_fam}**")
 
-        t_star, E_pred, nearest_label, nearest_E = invert_family(chosen_fam, E_target)
+        t_star, E_pred, nearest_label, nearest_E = core.invert_family(families[chosen_fam], E_target)
 
         st.subheader("Result")
         st.write(f"**Predicted thinner:** {t_star:.2f} %")
@@ -145,9 +194,12 @@ with left:
         st.write(f"**Composition:** {chosen_fam} (A+B) + {t_star:.2f}% thinner (by weight of A+B)")
 
     else:
-        st.error("Gap/out-of-range (no extrapolation).")
+        if non_invertible:
+            st.error("No invertible family covers this target.")
+        else:
+            st.error("Gap/out-of-range (no extrapolation).")
 
-        lower, upper = nearest_bounds(E_target)
+        lower, upper = core.nearest_bounds(ALL_MEASURED, E_target)
 
         st.subheader("Nearest validated bounds")
         if lower:
@@ -166,64 +218,4 @@ with left:
 with right:
     st.subheader("Measured vs interpolation")
 
-    fig, ax = plt.subplots(figsize=(7.5, 5.2))
-
-    # measured points
-    t_meas = np.array([p[2] for p in PHANTOMS], dtype=float)
-    E_meas = np.array([p[3] for p in PHANTOMS], dtype=float)
-    ax.plot(t_meas, E_meas, "o", label="Measured (phantoms)", zorder=3)
-
-    # ---- GAP SHADING (updated + correct) ----
-    # Use your updated boundary levels (kPa)
-    levels = sorted([
-        # 111.09930866645567,  # EF50_12_5T
-        # 97.25997744487732,   # EF30_0T
-        65.68354113025582,   # EF30_12_5T
-        54.20947752233499    # EF10_0T
-    ])
-
-    # Make sure shading spans the visible plot region:
-    ymin = float(np.min(E_meas))
-    ymax = float(np.max(E_meas))
-    pad = 0.05 * (ymax - ymin)
-    ymin_plot = ymin - pad
-    ymax_plot = ymax + pad
-    ax.set_ylim(ymin_plot, ymax_plot)
-
-    # Shade the *gaps* (inverse of validated bands)
-    # Bands: [ymin, L1], [L1, L2], [L2, L3], [L3, L4], [L4, ymax]
-    # We shade i%2==1 to highlight the "gap" bands (as per your earlier request).
-    bounds = [ymin_plot] + levels + [ymax_plot]
-    for i in range(len(bounds) - 1):
-        if i % 2 == 1:  # highlight gap bands
-            ax.axhspan(bounds[i], bounds[i + 1], alpha=0.10, zorder=0)
-
-    # Dotted reference lines at the four boundaries
-    for y in levels:
-        ax.axhline(y=y, linestyle=":", linewidth=1.2, alpha=0.8, zorder=1)
-
-    # interpolated curves
-    for fam in sorted(families.keys()):
-        d = families[fam]
-        if "interp" not in d:
-            continue
-        t_fine = np.linspace(d["tmin"], d["tmax"], 300)
-        ax.plot(t_fine, d["interp"](t_fine), label=f"{fam} interpolation", zorder=2)
-
-    # show target
-    # ax.axhline(E_target, linestyle="--", linewidth=1.2, zorder=2)
-    
-
-    ax.set_xlabel("Thinner concentration (%)")
-    ax.set_ylabel("Elastic modulus (kPa)")
-    ax.grid(True, alpha=0.3)
-
-    # Add a legend item for shaded gaps (without changing your existing legend too much)
-    gap_patch = Patch(alpha=0.10, label="Non-validated gaps")
-    handles, labels_ = ax.get_legend_handles_labels()
-    handles.append(gap_patch)
-    labels_.append("Non-validated gaps")
-    ax.legend(handles, labels_, loc="best")
-
-    fig.tight_layout()
-    st.pyplot(fig, clear_figure=True)
+    st.image(plot_png(PHANTOMS))
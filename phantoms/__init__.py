@@ -0,0 +1 @@
+"""Shared code for the phantom material database app and scripts."""
@@ -0,0 +1,155 @@
+"""
+Data loading, per-family interpolation and inversion shared by the Streamlit
+app (app/inverse_design_app.py) and the figure script
+(scripts/plot_elastic_modulus_vs_thinner_concentration.py).
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from scipy.interpolate import PchipInterpolator
+
+
+# ------------------------------------------------
+# Load phantom data from CSV (Table)
+# ------------------------------------------------
+# Thinner token after the family prefix, from labels like
+#   EF10_12_5T, EF10_12.5T, EF50_0T, EF30_25T, EF10_37_5T
+THINNER_RE = re.compile(r"_([0-9]+(?:[._][0-9]+)?)T")
+
+
+def load_phantoms(csv_path):
+    """Read the phantom table as a tuple of (label, family, thinner %, E kPa)."""
+    df = pd.read_csv(csv_path, usecols=["sample_label", "elastic_modulus_mean_kPa"])
+    df["label"] = df["sample_label"].str.strip()
+    df["family"] = df["label"].str.split("_", n=1).str[0]
+    thinner = df["label"].str.extract(THINNER_RE)[0]
+    if thinner.isna().any():
+        label = df["label"][thinner.isna()].iloc[0]
+        raise ValueError(f"Cannot parse thinner% from label: {label}")
+    df["t"] = thinner.str.replace("_", ".").astype(float)
+    df["E"] = df["elastic_modulus_mean_kPa"].astype(float)
+
+    return tuple(df[["label", "family", "t", "E"]].itertuples(index=False, name=None))
+
+
+# ------------------------------------------------
+# Build per-family interpolators
+# ------------------------------------------------
+def build_families(phantoms):
+    df = pd.DataFrame(list(phantoms), columns=["label", "fam", "t", "E"])
+
+    families = {}
+    for fam, grp in df.groupby("fam", sort=False):
+        t = grp["t"].to_numpy(dtype=float)
+        order = np.argsort(t)
+        labels = grp["label"].tolist()
+        d = families[fam] = {
+            "t": t[order],
+            "E": grp["E"].to_numpy(dtype=float)[order],
+            "labels": [labels[i] for i in order.tolist()],
+        }
+
+        # Only build interpolator if we have enough points
+        if len(d["t"]) >= 2:
+            # Inversion relies on E being strictly monotone in thinner; only such
+            # families get an ascending search key (E_sign * E) over the knots
+            dE = np.diff(d["E"])
+            if np.all(dE < 0) or np.all(dE > 0):
+                d["E_sign"] = -1.0 if dE[0] < 0 else 1.0
+                d["E_key"] = d["E_sign"] * d["E"]
+
+            d["interp"] = PchipInterpolator(d["t"], d["E"], extrapolate=False)
+            # PCHIP is already a PPoly: keep its knots and per-segment power-basis
+            # coefficients (shape (4, nseg)) so the solver can evaluate it directly
+            d["x"], d["c"] = d["interp"].x, d["interp"].c
+            d["tmin"], d["tmax"] = float(d["t"].min()), float(d["t"].max())
+            d["Emin"], d["Emax"] = float(d["E"].min()), float(d["E"].max())
+            d["t_fine"] = np.linspace(d["tmin"], d["tmax"], 300)
+            d["E_fine"] = d["interp"](d["t_fine"])
+
+    # Flat (t, E) arrays of all measured points, for plotting
+    t_all = np.concatenate([d["t"] for d in families.values()])
+    E_all = np.concatenate([d["E"] for d in families.values()])
+    return families, t_all, E_all
+
+
+MEASURED_DTYPE = [("E", "f8"), ("fam", object), ("t", "f8"), ("label", object)]
+
+
+def sort_measured(phantoms):
+    """All measured points as a structured array of (E, fam, t, label), sorted by E."""
+    arr = np.array([(E, fam, t, label) for (label, fam, t, E) in phantoms], dtype=MEASURED_DTYPE)
+    return arr[np.argsort(arr["E"], kind="stable")]
+
+
+# ------------------------------------------------
+# Inverse design
+# ------------------------------------------------
+def eval_cubic(x, c, t):
+    """Evaluate a piecewise cubic (PPoly knots/coefficients) at scalar t via Horner."""
+    i = min(max(int(np.searchsorted(x, t, side="right")) - 1, 0), len(x) - 2)
+    dt = t - x[i]
+    return ((c[0, i] * dt + c[1, i]) * dt + c[2, i]) * dt + c[3, i]
+
+
+def covering_families(families, E_target):
+    """
+    Families whose measured range contains E_target, split into
+    (invertible, non_invertible); each list is sorted by family name.
+    Non-invertible families are not strictly monotone in thinner.
+    """
+    covering = sorted(
+        fam for fam, d in families.items()
+        if ("interp" in d) and (d["Emin"] <= E_target <= d["Emax"])
+    )
+    invertible = [fam for fam in covering if "E_key" in families[fam]]
+    non_invertible = [fam for fam in covering if "E_key" not in families[fam]]
+    return invertible, non_invertible
+
+
+def invert_family(d, E_target):
+    if "E_key" not in d:
+        raise ValueError("Elastic modulus is not strictly monotone in thinner for this family")
+    x, c = d["x"], d["c"]
+
+    # PCHIP preserves monotonicity, so the segment containing E_target is the one
+    # whose measured end points bracket it.
+    seg = int(np.searchsorted(d["E_key"], d["E_sign"] * E_target, side="right")) - 1
+    seg = min(max(seg, 0), len(x) - 2)
+
+    if E_target == d["E"][seg]:
+        t_star = float(x[seg])
+    elif E_target == d["E"][seg + 1]:
+        t_star = float(x[seg + 1])
+    else:
+        # Solve c0*dt^3 + c1*dt^2 + c2*dt + (c3 - E_target) = 0 on [0, h].
+        # Where PCHIP flattens (zero end slope) the root is (nearly) double and
+        # np.roots returns it as a complex pair with a tiny imaginary part, so
+        # pick the root closest to the real interval rather than dropping those.
+        coeffs = c[:, seg].copy()
+        coeffs[-1] -= E_target
+        roots = np.roots(coeffs)
+        h = x[seg + 1] - x[seg]
+        real = roots.real
+        dist = np.abs(roots.imag) + np.maximum(-real, 0.0) + np.maximum(real - h, 0.0)
+        dt = float(np.clip(real[np.argmin(dist)], 0.0, h))
+        t_star = float(x[seg] + dt)
+
+    E_pred = float(eval_cubic(x, c, t_star))
+
+    j = int(np.argmin(np.abs(d["E"] - E_target)))
+    nearest_label = d["labels"][j]
+    nearest_E = float(d["E"][j])
+
+    return t_star, E_pred, nearest_label, nearest_E
+
+
+def nearest_bounds(all_measured, E_target):
+    # all_measured is sorted by E: lower = last E <= target, upper = first E >= target
+    i = int(np.searchsorted(all_measured["E"], E_target, side="right"))
+    j = int(np.searchsorted(all_measured["E"], E_target, side="left"))
+    lower = all_measured[i - 1].item() if i > 0 else None
+    upper = all_measured[j].item() if j < len(all_measured) else None
+    return lower, upper
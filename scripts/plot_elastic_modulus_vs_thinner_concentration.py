@@ -1,10 +1,14 @@
-import csv
-import re
+import sys
+from pathlib import Path
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.interpolate import PchipInterpolator
+from matplotlib.collections import PolyCollection
 from matplotlib.patches import Patch
 
+# Make the repo-level `phantoms` package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from phantoms.core import build_families, load_phantoms  # noqa: E402
+
 # Keep text editable in the exported SVG
 plt.rcParams["svg.fonttype"] = "none"
 
@@ -13,73 +17,17 @@ plt.rcParams["svg.fonttype"] = "none"
 # ------------------------------------------------
 CSV_PATH = "data/processed/phantoms_table.csv"
 
-def parse_thinner_pct(label: str) -> float:
-    """
-    Robustly parse thinner percentage from labels like:
-      EF10_12_5T, EF10_12.5T, EF50_0T, EF30_25T, EF10_37_5T
-    """
-    parts = label.strip().split("_")
-    if len(parts) < 2:
-        raise ValueError(f"Cannot parse thinner% from label: {label}")
-
-    # Most common:
-    # EF10_12_5T -> ["EF10","12","5T"]
-    # EF10_12.5T -> ["EF10","12.5T"]
-    # EF50_0T    -> ["EF50","0T"]
-    fam = parts[0]
-    rest = label[len(fam) + 1:]  # everything after "EFxx_"
-
-    # Keep only the first "...T" chunk (some labels may have sample suffixes elsewhere)
-    m = re.search(r"([0-9]+(?:[._][0-9]+)?)T", rest)
-    if m:
-        token = m.group(1).replace("_", ".")
-        return float(token)
-
-    # Fallback for patterns like "12_5T" where regex above might miss in weird cases
-    token = parts[1].replace("T", "").replace("_", ".")
-    return float(token)
-
-
-PHANTOMS = []
-with open(CSV_PATH, newline="", encoding="utf-8") as f:
-    reader = csv.DictReader(f)
-
-    for row in reader:
-        label = row["sample_label"].strip()
-        family = label.split("_")[0]
-
-        thinner_pct = parse_thinner_pct(label)
-
-        E_mean = float(row["elastic_modulus_mean_kPa"])
-        PHANTOMS.append((label, family, thinner_pct, E_mean))
+PHANTOMS = load_phantoms(CSV_PATH)
 
 # ------------------------------------------------
 # Organise data by silicone family for interpolation
 # ------------------------------------------------
-families = {}
-for label, fam, t, E in PHANTOMS:
-    families.setdefault(fam, {"t": [], "E": []})
-    families[fam]["t"].append(t)
-    families[fam]["E"].append(E)
-
-# Sort by thinner concentration and build monotonic interpolators
-for fam, d in families.items():
-    order = np.argsort(d["t"])
-    d["t"] = np.array(d["t"], float)[order]
-    d["E"] = np.array(d["E"], float)[order]
-
-    # Only build interpolator if we have enough points
-    if len(d["t"]) >= 2:
-        d["interp"] = PchipInterpolator(d["t"], d["E"], extrapolate=False)
-        d["tmin"], d["tmax"] = float(d["t"].min()), float(d["t"].max())
+families, t_meas, E_meas = build_families(PHANTOMS)
 
 # ------------------------------------------------
 # Plot
 # ------------------------------------------------
-plt.figure(figsize=(9, 6))
-
-t_meas = np.array([p[2] for p in PHANTOMS], dtype=float)
-E_meas = np.array([p[3] for p in PHANTOMS], dtype=float)
+fig = plt.figure(figsize=(9, 6))
 
 # Updated elastic modulus "gap-policy" reference levels (from your new means)
 levels = sorted([
@@ -98,10 +46,14 @@ ymax_plot = ymax + pad
 plt.ylim(ymin_plot, ymax_plot)
 
 # Shade alternating horizontal bands to highlight non-validated regions
-bounds = [ymin_plot] + levels + [ymax_plot]
-for i in range(len(bounds) - 1):
-    if i % 2 == 1:
-        plt.axhspan(bounds[i], bounds[i + 1], alpha=0.10)
+bounds = np.empty(len(levels) + 2)
+bounds[0], bounds[1:-1], bounds[-1] = ymin_plot, levels, ymax_plot
+verts = [[(0, lo), (1, lo), (1, hi), (0, hi)] for lo, hi in zip(bounds[1::2], bounds[2::2])]
+ax = plt.gca()
+ax.add_collection(
+    PolyCollection(verts, transform=ax.get_yaxis_transform(), alpha=0.10, linewidth=0),
+    autolim=False,
+)
 
 # Draw dotted reference lines at the selected modulus levels
 for y in levels:
@@ -114,8 +66,7 @@ plt.plot(t_meas, E_meas, "o", label="Measured (phantoms)")
 for fam in sorted(families.keys()):
     d = families[fam]
     if "interp" in d:
-        t_fine = np.linspace(d["tmin"], d["tmax"], 300)
-        plt.plot(t_fine, d["interp"](t_fine), label=f"{fam} interpolation")
+        plt.plot(d["t_fine"], d["E_fine"], label=f"{fam} interpolation")
 
 plt.xlabel("Thinner concentration (%)")
 plt.ylabel("Elastic modulus (kPa)")
@@ -135,7 +86,13 @@ plt.tight_layout()
 # Save and download safely (Colab / local)
 # ------------------------------------------------
 out_path = "Inverse_with_gap_shading.svg"
-plt.savefig(out_path, format="svg", bbox_inches="tight")
+# Measure the tight bbox once here; bbox_inches="tight" would make the SVG
+# backend do an extra measuring render before writing the file. Layout is
+# already fixed by tight_layout(), so drop the layout engine too: any engine
+# left on the figure also triggers that dry-run render in savefig.
+fig.set_layout_engine(None)
+bbox = fig.get_tightbbox().padded(plt.rcParams["savefig.pad_inches"])
+plt.savefig(out_path, format="svg", bbox_inches=bbox)
 plt.show()
 
 try:
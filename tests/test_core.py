@@ -0,0 +1,88 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from phantoms.core import (  # noqa: E402
+    build_families,
+    covering_families,
+    invert_family,
+    load_phantoms,
+)
+
+
+CSV_PATH = Path(__file__).resolve().parents[1] / "data" / "processed" / "phantoms_table.csv"
+
+
+def test_load_phantoms_parses_thinner_from_labels():
+    phantoms = load_phantoms(CSV_PATH)
+    assert len(phantoms) == 15
+    assert phantoms[0] == ("EF50_0T", "EF50", 0.0, 152.7)
+    assert phantoms[1][:3] == ("EF50_12.5T", "EF50", 12.5)
+
+
+def test_load_phantoms_rejects_unparseable_label(tmp_path):
+    csv_path = tmp_path / "phantoms.csv"
+    csv_path.write_text(
+        "sample_label,elastic_modulus_mean_kPa\n"
+        "EF10_12_5T,37.3\n"
+        "EF10_bad,10.0\n"
+    )
+    with pytest.raises(ValueError, match="EF10_bad"):
+        load_phantoms(csv_path)
+
+
+def make_family(t, E):
+    phantoms = tuple((f"X_{ti}T", "X", float(ti), float(Ei)) for ti, Ei in zip(t, E))
+    families, _, _ = build_families(phantoms)
+    return families["X"]
+
+
+# Decreasing family that flattens at maximum thinner, and an increasing one
+# with a flat end: PCHIP gives a zero end slope, i.e. a double root there.
+FLAT_END_FAMILIES = [
+    (np.arange(9) * 12.5, [54.2, 37.3, 27.4, 19.4, 15.5, 12.2, 8.8, 5.6, 5.55]),
+    ([0.0, 10.0, 20.0], [0.0, 10.0, 10.1]),
+]
+
+
+@pytest.mark.parametrize("t, E", FLAT_END_FAMILIES)
+def test_invert_family_at_measured_knots(t, E):
+    d = make_family(t, E)
+    for ti, Ei in zip(t, E):
+        t_star, E_pred, _, _ = invert_family(d, Ei)
+        assert t_star == pytest.approx(ti)
+        assert E_pred == pytest.approx(Ei)
+
+
+@pytest.mark.parametrize("t, E", FLAT_END_FAMILIES)
+def test_invert_family_round_trips_over_range(t, E):
+    d = make_family(t, E)
+    sign = 1.0 if E[-1] < E[0] else -1.0
+    targets = np.append(np.linspace(min(E), max(E), 201), E[-1] + sign * 1e-7)
+    for E_target in targets:
+        t_star, E_pred, _, _ = invert_family(d, E_target)
+        assert d["tmin"] <= t_star <= d["tmax"]
+        assert E_pred == pytest.approx(E_target, abs=1e-6)
+
+
+def test_non_monotone_family_builds_but_is_not_invertible():
+    d = make_family([0.0, 10.0, 20.0], [5.0, 9.0, 7.0])
+    assert "interp" in d and "E_key" not in d
+    with pytest.raises(ValueError):
+        invert_family(d, 8.0)
+
+
+def test_covering_families_reports_non_invertible_family():
+    phantoms = (
+        ("A_0T", "A", 0.0, 9.0), ("A_10T", "A", 10.0, 6.0), ("A_20T", "A", 20.0, 3.0),
+        ("B_0T", "B", 0.0, 5.0), ("B_10T", "B", 10.0, 12.0), ("B_20T", "B", 20.0, 10.0),
+    )
+    families, _, _ = build_families(phantoms)
+
+    assert covering_families(families, 8.0) == (["A"], ["B"])
+    assert covering_families(families, 4.0) == (["A"], [])
+    assert covering_families(families, 11.0) == ([], ["B"])
+    assert covering_families(families, 1.0) == ([], [])